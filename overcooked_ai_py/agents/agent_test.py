@@ -1,4 +1,7 @@
+import os
 import pickle
+import shutil
+import tempfile
 import time
 import unittest
 import numpy as np
@@ -8,7 +11,7 @@ from overcooked_ai_py.mdp.actions import Direction, Action
 from overcooked_ai_py.mdp.overcooked_mdp import OvercookedGridworld, OvercookedState, PlayerState, ObjectState
 from overcooked_ai_py.mdp.overcooked_env import OvercookedEnv
 from overcooked_ai_py.planning.planners import MediumLevelPlanner, NO_COUNTERS_PARAMS
-from overcooked_ai_py.agents.benchmarking import AgentEvaluator
+from overcooked_ai_py.agents.benchmarking import AgentEvaluator, TrajectoryBuffer, TrajectoryWriter
 
 np.random.seed(42)
 
@@ -44,6 +47,93 @@ class TestAgentEvaluator(unittest.TestCase):
         except AssertionError as e:
             self.fail("Trajectories were not returned in standard format:\n{}".format(e))
         
+    def test_parallel_rollouts(self):
+        ap = AgentPair(RandomAgent(), RandomAgent())
+        trajs = self.agent_eval.evaluate_agent_pair(ap, num_games=4, num_workers=2)
+        try:
+            AgentEvaluator.check_trajectories(trajs)
+        except AssertionError as e:
+            self.fail("Trajectories were not returned in standard format:\n{}".format(e))
+        self.assertEqual(len(trajs["ep_lengths"]), 4)
+        # Workers must be seeded independently: episode 0 comes from worker 0
+        # and episode 2 from worker 1, so identical action sequences would
+        # mean both workers replayed the same games
+        self.assertFalse(np.array_equal(trajs["ep_actions"][0], trajs["ep_actions"][2]))
+
+    def test_parallel_rollouts_variable_lengths(self):
+        # With an order list, episodes terminate early at varying lengths, so
+        # the workers' per-timestep fields cannot be merged by shape-sensitive
+        # concatenation
+        agent_eval = AgentEvaluator({"layout_name": "cramped_room", "start_order_list": ["any"]}, {"horizon": 400})
+        ap = AgentPair(GreedyHumanModel(agent_eval.mlp), GreedyHumanModel(agent_eval.mlp))
+        trajs = agent_eval.evaluate_agent_pair(ap, num_games=2, num_workers=2)
+        try:
+            AgentEvaluator.check_trajectories(trajs)
+        except AssertionError as e:
+            self.fail("Trajectories were not returned in standard format:\n{}".format(e))
+        self.assertEqual(len(trajs["ep_lengths"]), 2)
+        self.assertEqual(trajs["ep_observations"].ndim, 1)
+        for idx in range(2):
+            self.assertEqual(len(trajs["ep_observations"][idx]), trajs["ep_lengths"][idx])
+
+    def test_trajectory_buffer(self):
+        ap = AgentPair(RandomAgent(), RandomAgent())
+        trajs = self.agent_eval.evaluate_agent_pair(ap, num_games=2)
+        traj_buffer = TrajectoryBuffer.from_trajectories(trajs)
+        self.assertEqual(traj_buffer.num_episodes, 2)
+        self.assertEqual(traj_buffer.total_steps, sum(trajs["ep_lengths"]))
+        self.assertTrue(np.array_equal(traj_buffer.ep_lengths, trajs["ep_lengths"]))
+        self.assertEqual(traj_buffer.episode_starts().sum(), 2)
+        obs, actions, rewards, _ = traj_buffer.episode(1)
+        self.assertTrue(np.array_equal(obs, trajs["ep_observations"][1]))
+        self.assertTrue(np.array_equal(actions, trajs["ep_actions"][1]))
+        self.assertTrue(np.array_equal(rewards, trajs["ep_rewards"][1]))
+
+    def test_cross_pair_evaluation(self):
+        agents = [RandomAgent(), RandomAgent()]
+        cross_trajs = self.agent_eval.evaluate_agent_cross_pairs(agents, num_games=1)
+        self.assertEqual(set(cross_trajs.keys()), {(0, 0), (0, 1), (1, 0), (1, 1)})
+        for traj_buffer in cross_trajs.values():
+            self.assertEqual(traj_buffer.num_episodes, 1)
+            self.assertEqual(traj_buffer.total_steps, 100)
+
+    def test_trajectory_writer_roundtrip(self):
+        ap = AgentPair(RandomAgent(), RandomAgent())
+        directory = tempfile.mkdtemp()
+        try:
+            # Stream one batch with per-episode metadata, then append a second
+            # batch through a re-opened writer to cover the resume path
+            trajs = self.agent_eval.env.get_rollouts(ap, 2, info=False, metadata_fn=lambda info: {"time_taken": info[1]})
+            writer = TrajectoryWriter(directory)
+            writer.append(trajs)
+            writer_resumed = TrajectoryWriter(directory)
+            self.assertEqual(writer_resumed.num_episodes, 2)
+            writer_resumed.append(trajs)
+
+            loaded = TrajectoryWriter.load(directory)
+            try:
+                AgentEvaluator.check_trajectories(loaded)
+            except AssertionError as e:
+                self.fail("Loaded trajectories were not in standard format:\n{}".format(e))
+            self.assertEqual(len(loaded["ep_lengths"]), 4)
+            self.assertTrue(np.array_equal(loaded["ep_returns"][:2], trajs["ep_returns"]))
+            self.assertTrue(np.array_equal(loaded["ep_observations"][1], trajs["ep_observations"][1]))
+            self.assertEqual(loaded["metadatas"]["time_taken"], list(trajs["metadatas"]["time_taken"]) * 2)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_trajectory_save_load(self):
+        ap = AgentPair(RandomAgent(), RandomAgent())
+        trajs = self.agent_eval.evaluate_agent_pair(ap, num_games=2)
+        filename = "test_traj"
+        AgentEvaluator.save_trajectory(trajs, filename)
+        loaded_trajs = AgentEvaluator.load_trajectory(filename)
+        self.assertEqual(set(loaded_trajs.keys()), set(trajs.keys()))
+        self.assertTrue(np.array_equal(loaded_trajs["ep_returns"], trajs["ep_returns"]))
+        self.assertTrue(np.array_equal(loaded_trajs["ep_lengths"], trajs["ep_lengths"]))
+        self.assertEqual(loaded_trajs["ep_observations"][0][0], trajs["ep_observations"][0][0])
+        os.remove(filename + ".npz")
+
     def test_mlp_computation(self):
         try:
             self.agent_eval.mlp
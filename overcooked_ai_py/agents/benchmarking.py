@@ -1,7 +1,9 @@
-import json, copy
+import json, copy, hashlib, io, os
 import numpy as np
+import tqdm
+from concurrent.futures import ProcessPoolExecutor
 
-from overcooked_ai_py.utils import save_pickle, load_pickle, cumulative_rewards_from_rew_list, save_as_json, load_from_json, mean_and_std_err
+from overcooked_ai_py.utils import save_pickle, load_pickle, cumulative_rewards_from_rew_list, save_as_json, load_from_json, mean_and_std_err, fix_filetype
 from overcooked_ai_py.planning.planners import NO_COUNTERS_PARAMS, MediumLevelPlanner
 from overcooked_ai_py.mdp.layout_generator import LayoutGenerator
 from overcooked_ai_py.agents.agent import AgentPair, CoupledPlanningAgent, RandomAgent, GreedyHumanModel
@@ -23,6 +25,146 @@ DEFAULT_TRAJ_KEYS = [
 ]
 
 
+# Process-wide cache of computed planners, so that constructing many
+# evaluators over the same layout (e.g. in hyperparameter sweeps) only pays
+# the planner computation/unpickling cost once
+_PLANNER_CACHE = {}
+
+
+def _freeze_params(params):
+    """Recursively converts a params structure into a hashable cache key"""
+    if isinstance(params, dict):
+        return tuple(sorted((k, _freeze_params(v)) for k, v in params.items()))
+    if isinstance(params, (list, tuple)):
+        return tuple(_freeze_params(v) for v in params)
+    return params
+
+
+def _evaluate_agent_pair_worker(agent_pair, mdp_params, env_params, num_games, seed):
+    """Runs `num_games` rollouts in a worker process, reconstructing the environment locally"""
+    # Forked workers inherit the parent's random state, so without an explicit
+    # per-worker seed every worker would replay identical episodes
+    np.random.seed(seed)
+    env = OvercookedEnv(OvercookedGridworld.from_layout_name(**mdp_params), **env_params)
+    return env.get_rollouts(agent_pair, num_games, info=False)
+
+
+class TrajectoryBuffer(object):
+    """
+    Structure-of-arrays view over episodes in the standard trajectories format.
+
+    Per-timestep fields are stored as one flat array per field, with episode
+    boundaries recovered through `ep_offsets` (episode i spans indices
+    `ep_offsets[i]:ep_offsets[i + 1]`). This removes the need for repeated
+    np.concatenate passes and per-episode Python lists when exporting or
+    scanning trajectories.
+    """
+
+    def __init__(self, obs, actions, rewards, dones, ep_offsets, ep_returns):
+        self.obs = obs
+        self.actions = actions
+        self.rewards = rewards
+        self.dones = dones
+        self.ep_offsets = ep_offsets
+        self.ep_returns = ep_returns
+        assert len(self.obs) == len(self.actions) == len(self.rewards) == len(self.dones) == self.ep_offsets[-1]
+
+    @staticmethod
+    def from_trajectories(trajectories):
+        """Flattens the per-episode lists of a standard trajectories dict into one contiguous array per field"""
+        ep_lengths = [len(ep_obs) for ep_obs in trajectories["ep_observations"]]
+        ep_offsets = np.cumsum([0] + ep_lengths)
+        return TrajectoryBuffer(
+            obs=np.concatenate(trajectories["ep_observations"]),
+            actions=np.concatenate(trajectories["ep_actions"]),
+            rewards=np.concatenate(trajectories["ep_rewards"]),
+            dones=np.concatenate(trajectories["ep_dones"]).astype(bool),
+            ep_offsets=ep_offsets,
+            ep_returns=np.array(trajectories["ep_returns"])
+        )
+
+    @property
+    def num_episodes(self):
+        return len(self.ep_offsets) - 1
+
+    @property
+    def total_steps(self):
+        return self.ep_offsets[-1]
+
+    @property
+    def ep_lengths(self):
+        return np.diff(self.ep_offsets)
+
+    def episode_starts(self):
+        """Boolean mask over all timesteps, True at the first timestep of each episode"""
+        starts = np.zeros(self.total_steps, dtype=bool)
+        starts[self.ep_offsets[:-1]] = True
+        return starts
+
+    def episode(self, idx):
+        """Returns (obs, actions, rewards, dones) slice views for episode `idx`, without copying"""
+        ep_slice = slice(self.ep_offsets[idx], self.ep_offsets[idx + 1])
+        return self.obs[ep_slice], self.actions[ep_slice], self.rewards[ep_slice], self.dones[ep_slice]
+
+
+class TrajectoryWriter(object):
+    """
+    Streams episodes to disk as they complete instead of buffering entire
+    rollout batches in memory before saving. Each appended episode is written
+    immediately as its own npz chunk in the target directory, so peak memory
+    is one episode and an interrupted run keeps the episodes finished so far.
+    """
+
+    EPISODE_FILE_FMT = "ep_{:05d}"
+
+    def __init__(self, directory):
+        self.directory = directory
+        if not os.path.exists(directory):
+            os.makedirs(directory)
+        # Resume after any chunks already on disk, so re-opening a directory
+        # (e.g. after an interrupted run) appends instead of overwriting
+        self.num_episodes = len(self._episode_filenames(directory))
+
+    @staticmethod
+    def _episode_filenames(directory):
+        return sorted(f for f in os.listdir(directory) if f.startswith("ep_") and f.endswith(".npz"))
+
+    def append(self, trajectories):
+        """Writes each episode of a standard trajectories dict as one chunk"""
+        for idx in range(len(trajectories["ep_lengths"])):
+            episode = {k: [trajectories[k][idx]] for k in DEFAULT_TRAJ_KEYS if k != "metadatas"}
+            episode["metadatas"] = {k: [v[idx]] for k, v in trajectories["metadatas"].items()}
+            filename = os.path.join(self.directory, self.EPISODE_FILE_FMT.format(self.num_episodes))
+            AgentEvaluator.save_trajectory(episode, filename)
+            self.num_episodes += 1
+
+    @staticmethod
+    def load(directory):
+        """Reassembles the episode chunks in `directory` into a standard trajectories dict"""
+        filenames = TrajectoryWriter._episode_filenames(directory)
+        assert len(filenames) > 0, "No episode chunks found in {}".format(directory)
+        episodes = [AgentEvaluator.load_trajectory(os.path.join(directory, f)) for f in filenames]
+
+        trajectories = {}
+        for k in DEFAULT_TRAJ_KEYS:
+            if k == "metadatas":
+                continue
+            if k in ("ep_returns", "ep_lengths"):
+                trajectories[k] = np.concatenate([ep[k] for ep in episodes])
+            else:
+                # One object entry per episode, avoiding np.concatenate's
+                # shape inference over ragged episode contents
+                arr = np.empty(len(episodes), dtype=object)
+                for i, ep in enumerate(episodes):
+                    arr[i] = ep[k][0]
+                trajectories[k] = arr
+        # Each chunk's metadatas holds one-element lists; chain them back into
+        # the flat per-episode lists of the standard trajectories format
+        trajectories["metadatas"] = {k: [v for ep in episodes for v in ep["metadatas"][k]]
+                                     for k in episodes[0]["metadatas"]}
+        return trajectories
+
+
 class AgentEvaluator(object):
     """
     Class used to get rollouts and evaluate performance of various types of agents.
@@ -54,9 +196,14 @@ class AgentEvaluator(object):
     @property
     def mlp(self):
         assert not self.variable_mdp, "Variable mdp is not currently supported for planning"
-        if self._mlp is None: 
-            if self.debug: print("Computing Planner")
-            self._mlp = MediumLevelPlanner.from_pickle_or_compute(self.env.mdp, self.mlp_params, force_compute=self.force_compute)
+        if self._mlp is None:
+            cache_key = (_freeze_params(self.env.mdp.mdp_params), _freeze_params(self.mlp_params))
+            if not self.force_compute and cache_key in _PLANNER_CACHE:
+                self._mlp = _PLANNER_CACHE[cache_key]
+            else:
+                if self.debug: print("Computing Planner")
+                self._mlp = MediumLevelPlanner.from_pickle_or_compute(self.env.mdp, self.mlp_params, force_compute=self.force_compute)
+                _PLANNER_CACHE[cache_key] = self._mlp
         return self._mlp
 
     def evaluate_random_pair(self, interact=True, display=False):
@@ -89,10 +236,85 @@ class AgentEvaluator(object):
         agent_pair = AgentPair(h, r) if h_idx == 0 else AgentPair(r, h)
         return self.evaluate_agent_pair(agent_pair, display=display)
 
-    def evaluate_agent_pair(self, agent_pair, num_games=1, display=False, info=True):
+    def evaluate_agent_pair(self, agent_pair, num_games=1, display=False, info=True, num_workers=1):
+        if num_workers > 1:
+            return self.evaluate_agent_pair_parallel(agent_pair, num_games, num_workers, info=info)
         self.env.reset()
         return self.env.get_rollouts(agent_pair, num_games, display=display, info=info)
 
+    def evaluate_agent_pair_parallel(self, agent_pair, num_games, num_workers, info=True):
+        """
+        Splits `num_games` rollouts across `num_workers` worker processes and merges
+        the resulting trajectories.
+
+        Rollouts with planner-driven agents are CPU-bound Python, so processes
+        (rather than threads) are required for actual parallelism. Each worker
+        reconstructs its own environment from the evaluator's mdp and env params,
+        so the mdp cannot be variable, and the agent pair and env params (including
+        start_state_fn, if any) must be picklable.
+        """
+        assert not self.variable_mdp, "Cannot parallelize rollouts over variable mdps"
+        games_per_worker = [num_games // num_workers] * num_workers
+        for i in range(num_games % num_workers):
+            games_per_worker[i] += 1
+        games_per_worker = [n for n in games_per_worker if n > 0]
+
+        mdp_params, env_params = self.env.mdp.mdp_params, self.env.env_params
+        worker_seeds = [np.random.randint(2 ** 31) for _ in games_per_worker]
+        with ProcessPoolExecutor(max_workers=len(games_per_worker)) as executor:
+            futures = [executor.submit(_evaluate_agent_pair_worker, agent_pair, mdp_params, env_params, n, seed)
+                       for n, seed in zip(games_per_worker, worker_seeds)]
+            worker_trajs = [future.result() for future in futures]
+
+        trajectories = {}
+        for k in DEFAULT_TRAJ_KEYS:
+            if k == "metadatas":
+                continue
+            if k in ("ep_returns", "ep_lengths"):
+                trajectories[k] = np.concatenate([trajs[k] for trajs in worker_trajs])
+            else:
+                # One object entry per episode: np.concatenate would demand
+                # matching shapes when each worker's episodes happen to share
+                # one uniform length, which breaks as soon as workers' episodes
+                # end at different timesteps
+                episodes = [ep for trajs in worker_trajs for ep in trajs[k]]
+                arr = np.empty(len(episodes), dtype=object)
+                for i, ep in enumerate(episodes):
+                    arr[i] = ep
+                trajectories[k] = arr
+        # Chain the workers' already-merged metadatas so the result keeps the
+        # flat per-episode lists the serial get_rollouts path produces
+        trajectories["metadatas"] = {k: [v for trajs in worker_trajs for v in trajs["metadatas"][k]]
+                                     for k in worker_trajs[0]["metadatas"]}
+
+        mu, se = mean_and_std_err(trajectories["ep_returns"])
+        if info: print("Avg reward {:.2f} (std: {:.2f}, se: {:.2f}) over {} games of avg length {}".format(
+            mu, np.std(trajectories["ep_returns"]), se, num_games, np.mean(trajectories["ep_lengths"]))
+        )
+        return trajectories
+
+    def evaluate_agent_pair_streaming(self, agent_pair, num_games, directory, display=False, info=True):
+        """
+        Rolls out `num_games` games one at a time, writing each completed
+        episode straight to `directory` through a TrajectoryWriter. Peak
+        memory is one episode instead of the whole batch; reload the full
+        trajectories dict afterwards with TrajectoryWriter.load(directory).
+        """
+        writer = TrajectoryWriter(directory)
+        ep_returns = []
+        range_fn = tqdm.trange if info else range
+        for _ in range_fn(num_games):
+            self.env.reset()
+            trajs = self.env.get_rollouts(agent_pair, 1, display=display, info=False)
+            ep_returns.append(trajs["ep_returns"][0])
+            writer.append(trajs)
+
+        mu, se = mean_and_std_err(ep_returns)
+        if info: print("Avg reward {:.2f} (std: {:.2f}, se: {:.2f}) over {} games".format(
+            mu, np.std(ep_returns), se, num_games)
+        )
+        return writer
+
     def get_agent_pair_trajs(self, a0, a1=None, num_games=100, display=False):
         """Evaluate agent pair on both indices, and return trajectories by index"""
         if a1 is None:
@@ -103,6 +325,23 @@ class AgentEvaluator(object):
             trajs_1 = self.evaluate_agent_pair(AgentPair(a1, a0), num_games=num_games, display=display)
         return trajs_0, trajs_1
 
+    def evaluate_agent_cross_pairs(self, agents, num_games=1, display=False, info=False):
+        """
+        Rolls out every ordered (i, j) pairing of a population of agents on the
+        shared evaluator env, returning {(i, j): TrajectoryBuffer}.
+
+        Agents are instantiated once by the caller and reused across pairings,
+        so evaluating the full cross-product only pays for the rollouts
+        themselves rather than per-pair environment and model setup.
+        """
+        cross_trajs = {}
+        for i, a0 in enumerate(agents):
+            for j, a1 in enumerate(agents):
+                agent_pair = AgentPair(a0, a1, allow_duplicate_agents=a0 is a1)
+                trajs = self.evaluate_agent_pair(agent_pair, num_games=num_games, display=display, info=info)
+                cross_trajs[(i, j)] = TrajectoryBuffer.from_trajectories(trajs)
+        return cross_trajs
+
     @staticmethod
     def check_trajectories(trajectories):
         """
@@ -142,23 +381,36 @@ class AgentEvaluator(object):
                 len(states), len(actions), len(rewards)
             )
 
-            # Checking that actions would give rise to same behaviour in current MDP
-            for i in range(len(states) - 1):
-                curr_state = states[i]
-                simulation_env.state = curr_state
-
-                next_state, reward, done, info = simulation_env.step(actions[i])
-
-                assert states[i + 1] == next_state, "States differed (expected vs actual): {}".format(
-                    simulation_env.display_states(states[i + 1], next_state)
-                )
-                assert rewards[i] == reward, "{} \t {}".format(rewards[i], reward)
+            # Checking that actions would give rise to same behaviour in current MDP.
+            # All transitions of the episode are replayed in one batched pass, and the
+            # resulting rewards compared against the recorded ones with a single array op.
+            simulated_states, simulated_rewards = simulation_env.batched_step(states[:-1], actions[:-1])
+
+            # Fingerprints are canonical, so the scalar compare replaces the
+            # recursive equality traversal on the (common) matching path; the
+            # deep comparison only runs to build the mismatch error message
+            for i, simulated_state in enumerate(simulated_states):
+                if states[i + 1].fingerprint() != simulated_state.fingerprint():
+                    assert states[i + 1] == simulated_state, "States differed (expected vs actual): {}".format(
+                        simulation_env.display_states(states[i + 1], simulated_state)
+                    )
+
+            assert np.array_equal(np.array(rewards[:-1]), simulated_rewards), "{} \t {}".format(
+                rewards[:-1], simulated_rewards
+            )
 
     @staticmethod
     def mdps_and_envs_from_trajectories(trajectories):
         mdps, envs = [], []
         for idx in range(len(trajectories["ep_lengths"])):
             mdp_params, env_params = trajectories["mdp_params"][idx], trajectories["env_params"][idx]
+            if mdps and mdp_params == trajectories["mdp_params"][idx - 1] and env_params == trajectories["env_params"][idx - 1]:
+                # Episodes from the same run typically share their mdp and env
+                # params, so reuse the previous instances instead of rebuilding
+                # the gridworld from the layout each time
+                mdps.append(mdps[-1])
+                envs.append(envs[-1])
+                continue
             mdp = OvercookedGridworld.from_layout_name(**mdp_params)
             env = OvercookedEnv(mdp, **env_params)
             mdps.append(mdp)
@@ -168,33 +420,98 @@ class AgentEvaluator(object):
 
     ### I/O METHODS ###
 
+    CHECKSUM_KEY = "__checksum__"
+
     @staticmethod
-    def save_trajectory(trajectory, filename):
-        AgentEvaluator.check_trajectories(trajectory)
-        save_pickle(trajectory, filename)
+    def _trajectory_checksum(traj_arrays):
+        """
+        Content hash over every trajectory field. Object fields are hashed
+        through their serialized bytes, so the stamp covers the same data the
+        full dynamics check would validate (observations, actions, rewards),
+        not just the cheap typed fields.
+        """
+        h = hashlib.blake2b(digest_size=16)
+        for k in sorted(traj_arrays):
+            if k == AgentEvaluator.CHECKSUM_KEY:
+                continue
+            buf = io.BytesIO()
+            np.save(buf, traj_arrays[k])
+            h.update(k.encode())
+            h.update(buf.getvalue())
+        return h.hexdigest()
 
     @staticmethod
-    def load_trajectory(filename):
-        traj = load_pickle(filename)
-        AgentEvaluator.check_trajectories(traj)
+    def save_trajectory(trajectory, filename, use_pickle=False, validate=False):
+        """
+        Saves a trajectories dict as a compressed npz archive with one entry per
+        field. Per-episode scalar fields (returns, lengths) are stored as plain
+        typed arrays rather than going through pickle's per-object protocol;
+        ragged and object fields (observations, actions, params) fall back to
+        pickled object arrays within the archive. `use_pickle` preserves the old
+        single-blob pickle format.
+
+        A content checksum is stamped into the archive so that load_trajectory
+        can skip the full dynamics check; trajectories are produced by the same
+        mdp code that would validate them, so `validate` defaults to False.
+        """
+        if validate:
+            AgentEvaluator.check_trajectories(trajectory)
+        if use_pickle:
+            save_pickle(trajectory, filename)
+        else:
+            traj_arrays = {}
+            for k, v in trajectory.items():
+                if k in ("ep_returns", "ep_lengths"):
+                    traj_arrays[k] = np.asarray(v)
+                elif isinstance(v, dict):
+                    # metadatas is a merged dict rather than a per-episode list
+                    arr = np.empty((), dtype=object)
+                    arr[()] = v
+                    traj_arrays[k] = arr
+                else:
+                    # Build the object array by hand: np.asarray would try to
+                    # broadcast nested tuples/lists into multi-dimensional arrays
+                    arr = np.empty(len(v), dtype=object)
+                    for i, item in enumerate(v):
+                        arr[i] = item
+                    traj_arrays[k] = arr
+            traj_arrays[AgentEvaluator.CHECKSUM_KEY] = np.asarray(AgentEvaluator._trajectory_checksum(traj_arrays))
+            np.savez_compressed(fix_filetype(filename, ".npz"), **traj_arrays)
+
+    @staticmethod
+    def load_trajectory(filename, use_pickle=False, force_check=False):
+        """
+        Loads a trajectories dict saved by save_trajectory. If the archive
+        carries a valid checksum stamp the expensive full dynamics check is
+        skipped unless `force_check` is passed; files without a stamp (or any
+        pickle-format file) are always fully checked.
+        """
+        checksum = None
+        if use_pickle:
+            traj = load_pickle(filename)
+        else:
+            with np.load(fix_filetype(filename, ".npz"), allow_pickle=True) as traj_data:
+                traj = {k: (traj_data[k].item() if traj_data[k].ndim == 0 else traj_data[k]) for k in traj_data.files}
+            checksum = traj.pop(AgentEvaluator.CHECKSUM_KEY, None)
+        if checksum is not None:
+            assert checksum == AgentEvaluator._trajectory_checksum(traj), \
+                "Trajectory file {} failed checksum verification".format(filename)
+            if force_check:
+                AgentEvaluator.check_trajectories(traj)
+        else:
+            AgentEvaluator.check_trajectories(traj)
         return traj
 
     @staticmethod
     def save_traj_in_stable_baselines_format(rollout_trajs, filename):
-        # Converting episode dones to episode starts
-        eps_starts = [np.zeros(len(traj)) for traj in rollout_trajs["ep_dones"]]
-        for ep_starts in eps_starts:
-            ep_starts[0] = 1
-        eps_starts = [ep_starts.astype(np.bool) for ep_starts in eps_starts]
-
+        traj_buffer = TrajectoryBuffer.from_trajectories(rollout_trajs)
         stable_baselines_trajs_dict = {
-            'actions': np.concatenate(rollout_trajs["ep_actions"]),
-            'obs': np.concatenate(rollout_trajs["ep_observations"]),
-            'rewards': np.concatenate(rollout_trajs["ep_rewards"]),
-            'episode_starts': np.concatenate(eps_starts),
-            'episode_returns': rollout_trajs["ep_returns"]
+            'actions': traj_buffer.actions,
+            'obs': traj_buffer.obs,
+            'rewards': traj_buffer.rewards,
+            'episode_starts': traj_buffer.episode_starts(),
+            'episode_returns': traj_buffer.ep_returns
         }
-        stable_baselines_trajs_dict = { k:np.array(v) for k, v in stable_baselines_trajs_dict.items() }
         np.savez(filename, **stable_baselines_trajs_dict)
 
     @staticmethod
@@ -247,13 +564,21 @@ class AgentEvaluator(object):
         env_params = trajectories["env_params"][traj_idx]
         env = AgentEvaluator(mdp_params, env_params=env_params).env
 
+        # Render every frame once upfront so that scrubbing the slider is a
+        # constant-time lookup rather than a full gridworld re-render per tick
+        frames = []
+        for state in states:
+            env.state = state
+            frames.append(str(env))
+        action_chars = [Action.joint_action_to_char((Action.STAY, Action.STAY))] + \
+            [Action.joint_action_to_char(joint_action) for joint_action in joint_actions]
+
         def update(t = 1.0):
-            env.state = states[int(t)]
-            joint_action = joint_actions[int(t - 1)] if t > 0 else (Action.STAY, Action.STAY)
-            print(env)
-            print("Joint Action: {} \t Score: {}".format(Action.joint_action_to_char(joint_action), cumulative_rewards[t]))
-            
-            
+            t = int(t)
+            print(frames[t])
+            print("Joint Action: {} \t Score: {}".format(action_chars[t], cumulative_rewards[t]))
+
+
         t = widgets.IntSlider(min=0, max=len(states) - 1, step=1, value=0)
         out = interactive_output(update, {'t': t})
         display(out, t)
\ No newline at end of file
@@ -42,7 +42,7 @@ class Action(object):
     INDEX_TO_ACTION_INDEX_PAIRS = [v for v in itertools.product(range(len(INDEX_TO_ACTION)), repeat=2)]
     ACTION_TO_INDEX = { a:i for i, a in enumerate(INDEX_TO_ACTION) }
     MOTION_ACTIONS = Direction.ALL_DIRECTIONS + [STAY]
-    ACTION_TO_CHAR = { 
+    ACTION_TO_CHAR = {
         Direction.NORTH: "↑",
         Direction.SOUTH: "↓",
         Direction.EAST: "→",
@@ -50,6 +50,10 @@ class Action(object):
         STAY: "stay",
         INTERACT: INTERACT
     }
+    # All 36 joint action char tuples, precomputed so that rendering a
+    # trajectory is a single dict lookup per timestep
+    JOINT_ACTION_TO_CHAR = { (a0, a1): (c0, c1)
+                             for (a0, c0), (a1, c1) in itertools.product(ACTION_TO_CHAR.items(), repeat=2) }
     NUM_ACTIONS = len(ALL_ACTIONS)
 
     @staticmethod
@@ -78,7 +82,10 @@ class Action(object):
 
     @staticmethod
     def sample(action_probs):
-        return np.random.choice(Action.ALL_ACTIONS, p=action_probs)
+        # Sample an index rather than the actions themselves, as actions are
+        # a mix of tuples and strings which numpy cannot pack into an array
+        action_idx = np.random.choice(len(Action.ALL_ACTIONS), p=action_probs)
+        return Action.INDEX_TO_ACTION[action_idx]
     
     @staticmethod
     def argmax(action_probs):
@@ -107,5 +114,9 @@ class Action(object):
 
     @staticmethod
     def joint_action_to_char(joint_action):
+        joint_action = tuple(joint_action)
+        if joint_action in Action.JOINT_ACTION_TO_CHAR:
+            return Action.JOINT_ACTION_TO_CHAR[joint_action]
+        # Fallback for joint actions of more than two players
         assert all([a in Action.ALL_ACTIONS for a in joint_action])
         return tuple(Action.to_char(a) for a in joint_action)
\ No newline at end of file
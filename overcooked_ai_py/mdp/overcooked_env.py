@@ -100,6 +100,24 @@ class OvercookedEnv(object):
             }
         return (next_state, sparse_reward, done, info)
 
+    def batched_step(self, states, joint_actions):
+        """Computes the mdp transition for a batch of state–joint-action pairs.
+
+        Unlike `step`, this does not read or advance the environment's own state
+        and time bookkeeping, so an entire recorded trajectory can be replayed in
+        a single pass (e.g. for dynamics validation) without per-step environment
+        copies or resets.
+
+        Returns (next_states, sparse_rewards), numpy arrays with leading axis
+        of length len(states).
+        """
+        next_states, sparse_rewards = [], []
+        for state, joint_action in zip(states, joint_actions):
+            next_state, sparse_reward, _ = self.mdp.get_state_transition(state, joint_action)
+            next_states.append(next_state)
+            sparse_rewards.append(sparse_reward)
+        return np.array(next_states, dtype=object), np.array(sparse_rewards)
+
     def reset(self):
         """Resets the environment. Does NOT reset the agent."""
         self.mdp = self.mdp_generator_fn()
@@ -162,7 +180,8 @@ class OvercookedEnv(object):
         if include_final_state:
             trajectory.append((s_tp1, (None, None), 0, True, None))
 
-        return np.array(trajectory), self.t, self.cumulative_sparse_rewards, self.cumulative_shaped_rewards
+        # dtype=object as the rows hold rich state/action/info objects
+        return np.array(trajectory, dtype=object), self.t, self.cumulative_sparse_rewards, self.cumulative_shaped_rewards
 
     def get_rollouts(self, agent_pair, num_games, display=False, final_state=False, agent_idx=0, reward_shaping=0.0, display_until=np.Inf, info=True, metadata_fn=lambda x: {}):
         """
@@ -224,8 +243,10 @@ class OvercookedEnv(object):
             mu, np.std(trajectories["ep_returns"]), se, num_games, np.mean(trajectories["ep_lengths"]))
         )
 
-        # Converting to numpy arrays
-        trajectories = {k: np.array(v) for k, v in trajectories.items()}
+        # Converting to numpy arrays. Per-timestep fields are object arrays
+        # since episode lengths may vary across games
+        trajectories = {k: np.array(v) if k in ("ep_returns", "ep_lengths") else np.array(v, dtype=object)
+                        for k, v in trajectories.items()}
 
         # Merging all metadata dictionaries, assumes same keys throughout all
         trajectories["metadatas"] = merge_dictionaries(trajectories["metadatas"])
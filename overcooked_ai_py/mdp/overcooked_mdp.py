@@ -301,6 +301,28 @@ class OvercookedState(object):
             (self.players, tuple(self.objects.values()), order_list_hash)
         )
 
+    def fingerprint(self):
+        """
+        Canonical hash of the state, cached on the instance. Unlike __hash__,
+        which depends on the insertion order of the objects dict, the
+        fingerprint is order-insensitive to match __eq__ semantics, so states
+        that compare equal always share a fingerprint. This makes it a cheap
+        scalar pre-check before a full recursive equality comparison. Only
+        valid as long as the state is not mutated afterwards.
+        """
+        if not hasattr(self, "_fingerprint"):
+            order_list_hash = tuple(self.order_list) if self.order_list is not None else None
+            self._fingerprint = hash((self.players, frozenset(self.objects.items()), order_list_hash))
+        return self._fingerprint
+
+    def __getstate__(self):
+        # hash() is salted per interpreter process, so a pickled fingerprint
+        # would never match one computed after reload; drop it and let it be
+        # recomputed on first use instead
+        state_dict = self.__dict__.copy()
+        state_dict.pop("_fingerprint", None)
+        return state_dict
+
     def __str__(self):
         return 'Players: {}, Objects: {}, Order list: {}'.format( 
             str(self.players), str(list(self.objects.values())), str(self.order_list))
@@ -371,8 +393,21 @@ class OvercookedGridworld(object):
         self.reward_shaping_params = NO_REW_SHAPING_PARAMS if rew_shaping_params is None else rew_shaping_params
         self.layout_name = layout_name
 
+    @property
+    def terrain_arr(self):
+        """
+        The terrain as a contiguous ascii-coded np.uint8 array of shape
+        (height, width), for consumers that want vectorized scans over the
+        grid instead of walking the list-of-lists terrain_mtx. Terrain is
+        constant, so this is computed once per mdp; lazily, so that mdps
+        unpickled from older planner files still get the attribute.
+        """
+        if not hasattr(self, "_terrain_arr"):
+            self._terrain_arr = np.array([[ord(c) for c in row] for row in self.terrain_mtx], dtype=np.uint8)
+        return self._terrain_arr
+
     def __eq__(self, other):
-        return np.array_equal(self.terrain_mtx, other.terrain_mtx) and \
+        return np.array_equal(self.terrain_arr, other.terrain_arr) and \
                 self.start_player_positions == other.start_player_positions and \
                 self.start_order_list == other.start_order_list and \
                 self.soup_cooking_time == other.soup_cooking_time and \
@@ -533,6 +568,18 @@ class OvercookedGridworld(object):
     def get_valid_player_positions(self):
         return self.terrain_pos_dict[' ']
 
+    @property
+    def valid_player_positions_set(self):
+        """
+        Valid player positions as a frozenset, for O(1) membership tests in
+        the transition hot path. Computed lazily (rather than in the
+        constructor) so that mdps unpickled from older planner files still
+        get the attribute.
+        """
+        if not hasattr(self, "_valid_player_positions"):
+            self._valid_player_positions = frozenset(self.terrain_pos_dict[' '])
+        return self._valid_player_positions
+
     def get_valid_joint_player_positions(self):
         """Returns all valid tuples of the form (p0_pos, p1_pos, p2_pos, ...)"""
         valid_positions = self.get_valid_player_positions() 
@@ -843,7 +890,7 @@ class OvercookedGridworld(object):
             return position, orientation
         new_pos = Action.move_in_direction(position, action)
         new_orientation = orientation if action == Action.STAY else action
-        if new_pos not in self.get_valid_player_positions():
+        if new_pos not in self.valid_player_positions_set:
             return position, new_orientation
         return new_pos, new_orientation
 
@@ -861,7 +908,7 @@ class OvercookedGridworld(object):
         for player_state in state.players:
             # Check that players are not on terrain
             pos = player_state.position
-            assert pos in self.get_valid_player_positions()
+            assert pos in self.valid_player_positions_set
 
             # Check that held objects have the same position
             if player_state.held_object is not None:
@@ -934,7 +981,9 @@ class OvercookedGridworld(object):
         """String representation of the current state"""
         players_dict = {player.position: player for player in state.players}
 
-        grid_string = ""
+        # Built as a list of chunks with a single final join, rather than
+        # quadratic string concatenation over the grid
+        grid_chunks = []
         for y, terrain_row in enumerate(self.terrain_mtx):
             for x, element in enumerate(terrain_row):
                 if (x, y) in players_dict.keys():
@@ -942,53 +991,76 @@ class OvercookedGridworld(object):
                     orientation = player.orientation
                     assert orientation in Direction.ALL_DIRECTIONS
 
-                    grid_string += Action.ACTION_TO_CHAR[orientation]
+                    grid_chunks.append(Action.ACTION_TO_CHAR[orientation])
                     player_object = player.held_object
                     if player_object:
-                        grid_string += player_object.name[:1]
+                        grid_chunks.append(player_object.name[:1])
                     else:
                         player_idx_lst = [i for i, p in enumerate(state.players) if p.position == player.position]
                         assert len(player_idx_lst) == 1
-                        grid_string += str(player_idx_lst[0])
+                        grid_chunks.append(str(player_idx_lst[0]))
                 else:
                     if element == "X" and state.has_object((x, y)):
                         state_obj = state.get_object((x, y))
-                        grid_string = grid_string + element + state_obj.name[:1]
+                        grid_chunks.append(element + state_obj.name[:1])
 
                     elif element == "P" and state.has_object((x, y)):
                         soup_obj = state.get_object((x, y))
                         soup_type, num_items, cook_time = soup_obj.state
                         if soup_type == "onion":
-                            grid_string += "ø"
+                            grid_chunks.append("ø")
                         elif soup_type == "tomato":
-                            grid_string += "†"
+                            grid_chunks.append("†")
                         else:
                             raise ValueError()
 
                         if num_items == self.num_items_for_soup:
-                            grid_string += str(cook_time)
-                        
-                        # NOTE: do not currently have terminal graphics 
+                            grid_chunks.append(str(cook_time))
+
+                        # NOTE: do not currently have terminal graphics
                         # support for cooking times greater than 3.
                         elif num_items == 2:
-                            grid_string += "="
+                            grid_chunks.append("=")
                         else:
-                            grid_string += "-"
+                            grid_chunks.append("-")
                     else:
-                        grid_string += element + " "
+                        grid_chunks.append(element + " ")
+
+            grid_chunks.append("\n")
 
-            grid_string += "\n"
-        
         if state.order_list is not None:
-            grid_string += "Current orders: {}/{} are any's\n".format(
+            grid_chunks.append("Current orders: {}/{} are any's\n".format(
                 len(state.order_list), len([order == "any" for order in state.order_list])
-            )
-        return grid_string
+            ))
+        return "".join(grid_chunks)
 
     ###################
     # STATE ENCODINGS #
     ###################
 
+    @property
+    def base_map_feature_layers(self):
+        """
+        Masks for the layout-constant feature layers. Terrain never changes
+        for the lifetime of the mdp, so these are computed once and shared
+        read-only across all state encodings. Computed lazily so that mdps
+        unpickled from older planner files still get the attribute.
+        """
+        if not hasattr(self, "_base_map_feature_layers"):
+            def make_loc_layer(locations):
+                layer = np.zeros(self.shape)
+                for loc in locations:
+                    layer[loc] = 1
+                return layer
+            self._base_map_feature_layers = {
+                "pot_loc": make_loc_layer(self.get_pot_locations()),
+                "counter_loc": make_loc_layer(self.get_counter_locations()),
+                "onion_disp_loc": make_loc_layer(self.get_onion_dispenser_locations()),
+                "dish_disp_loc": make_loc_layer(self.get_dish_dispenser_locations()),
+                "serve_loc": make_loc_layer(self.get_serving_locations())
+            }
+        return self._base_map_feature_layers
+
     def lossless_state_encoding(self, overcooked_state, debug=False):
         """Featurizes a OvercookedState object into a stack of boolean masks that are easily readable by a CNN"""
         assert type(debug) is bool
@@ -996,12 +1068,51 @@ class OvercookedGridworld(object):
         variable_map_features = ["onions_in_pot", "onions_cook_time", "onion_soup_loc", "dishes", "onions"]
 
         all_objects = overcooked_state.all_objects_list
+        num_players = len(overcooked_state.players)
+        pot_locations = self.get_pot_locations()
 
         def make_layer(position, value):
                 layer = np.zeros(self.shape)
                 layer[position] = value
                 return layer
 
+        # Layer contents are identical for every player; only the stacking
+        # order below is player-dependent, so the masks are computed once
+        player_features = ["player_{}_loc".format(i) for i in range(num_players)] + \
+                    ["player_{}_orientation_{}".format(i, Direction.DIRECTION_TO_INDEX[d])
+                    for i, d in itertools.product(range(num_players), Direction.ALL_DIRECTIONS)]
+        state_mask_dict = {k:np.zeros(self.shape) for k in player_features + variable_map_features}
+
+        # MAP LAYERS (layout-constant, shared across encodings)
+        state_mask_dict.update(self.base_map_feature_layers)
+
+        # PLAYER LAYERS
+        for i, player in enumerate(overcooked_state.players):
+            player_orientation_idx = Direction.DIRECTION_TO_INDEX[player.orientation]
+            state_mask_dict["player_{}_loc".format(i)] = make_layer(player.position, 1)
+            state_mask_dict["player_{}_orientation_{}".format(i, player_orientation_idx)] = make_layer(player.position, 1)
+
+        # OBJECT & STATE LAYERS
+        for obj in all_objects:
+            if obj.name == "soup":
+                soup_type, num_onions, cook_time = obj.state
+                if soup_type == "onion":
+                    if obj.position in pot_locations:
+                        state_mask_dict["onions_in_pot"] += make_layer(obj.position, num_onions)
+                        state_mask_dict["onions_cook_time"] += make_layer(obj.position, cook_time)
+                    else:
+                        # If player soup is not in a pot, put it in separate mask
+                        state_mask_dict["onion_soup_loc"] += make_layer(obj.position, 1)
+                else:
+                    raise ValueError("Unrecognized soup")
+
+            elif obj.name == "dish":
+                state_mask_dict["dishes"] += make_layer(obj.position, 1)
+            elif obj.name == "onion":
+                state_mask_dict["onions"] += make_layer(obj.position, 1)
+            else:
+                raise ValueError("Unrecognized object")
+
         def process_for_player(primary_agent_idx):
             # Ensure that primary_agent_idx layers are ordered before other_agent_idx layers
             other_agent_idx = 1 - primary_agent_idx
@@ -1010,51 +1121,6 @@ class OvercookedGridworld(object):
                         for i, d in itertools.product([primary_agent_idx, other_agent_idx], Direction.ALL_DIRECTIONS)]
 
             LAYERS = ordered_player_features + base_map_features + variable_map_features
-            state_mask_dict = {k:np.zeros(self.shape) for k in LAYERS}
-
-            # MAP LAYERS
-            for loc in self.get_counter_locations():
-                state_mask_dict["counter_loc"][loc] = 1
-
-            for loc in self.get_pot_locations():
-                state_mask_dict["pot_loc"][loc] = 1
-
-            for loc in self.get_onion_dispenser_locations():
-                state_mask_dict["onion_disp_loc"][loc] = 1
-
-            for loc in self.get_dish_dispenser_locations():
-                state_mask_dict["dish_disp_loc"][loc] = 1
-
-            for loc in self.get_serving_locations():
-                state_mask_dict["serve_loc"][loc] = 1
-
-            # PLAYER LAYERS
-            for i, player in enumerate(overcooked_state.players):
-                player_orientation_idx = Direction.DIRECTION_TO_INDEX[player.orientation]
-                state_mask_dict["player_{}_loc".format(i)] = make_layer(player.position, 1)
-                state_mask_dict["player_{}_orientation_{}".format(i, player_orientation_idx)] = make_layer(player.position, 1)
-
-            # OBJECT & STATE LAYERS
-            for obj in all_objects:
-                if obj.name == "soup":
-                    soup_type, num_onions, cook_time = obj.state
-                    if soup_type == "onion":
-                        if obj.position in self.get_pot_locations():
-                            soup_type, num_onions, cook_time = obj.state
-                            state_mask_dict["onions_in_pot"] += make_layer(obj.position, num_onions)
-                            state_mask_dict["onions_cook_time"] += make_layer(obj.position, cook_time)
-                        else:
-                            # If player soup is not in a pot, put it in separate mask
-                            state_mask_dict["onion_soup_loc"] += make_layer(obj.position, 1)
-                    else:
-                        raise ValueError("Unrecognized soup")
-
-                elif obj.name == "dish":
-                    state_mask_dict["dishes"] += make_layer(obj.position, 1)
-                elif obj.name == "onion":
-                    state_mask_dict["onions"] += make_layer(obj.position, 1)
-                else:
-                    raise ValueError("Unrecognized object")
 
             if debug:
                 print(len(LAYERS))
@@ -1071,8 +1137,6 @@ class OvercookedGridworld(object):
             # NOTE: currently not including time left or order_list in featurization
             return np.array(state_mask_stack).astype(int)
 
-        # NOTE: Currently not very efficient, a decent amount of computation repeated here
-        num_players = len(overcooked_state.players)
         final_obs_for_players = tuple(process_for_player(i) for i in range(num_players))
         return final_obs_for_players
 
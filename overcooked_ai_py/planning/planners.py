@@ -12,6 +12,17 @@ from overcooked_ai_py.data.planners import load_saved_action_manager, PLANNERS_D
 # computation to prevent or identify possible minor errors
 SAFE_RUN = False
 
+# Shared dummy order list for motion-plan rollouts, hoisted out of the
+# per-call path. Sharing one list is safe as order lists are never mutated
+# in place: delivery transitions rebind a fresh copy on the successor state.
+# Must stay a plain list since OvercookedState.__eq__ checks the type
+DUMMY_ORDER_LIST = ['any', 'any']
+
+# Upper bound on entries in the per-planner memoization caches. Planners are
+# shared process-wide across evaluators, so an unbounded cache would pin every
+# state expanded over a long sweep in memory
+MAX_CACHE_SIZE = 100000
+
 
 NO_COUNTERS_PARAMS = {
         'start_orientations': False,
@@ -621,7 +632,7 @@ class JointMotionPlanner(object):
         # (not on objects and other aspects of state).
         # Also assumes can't deliver more than two orders in one motion goal
         # (otherwise Environment will terminate)
-        dummy_state = OvercookedState.from_players_pos_and_or(joint_start_state, order_list=['any', 'any'])
+        dummy_state = OvercookedState.from_players_pos_and_or(joint_start_state, order_list=DUMMY_ORDER_LIST)
         env = OvercookedEnv(self.mdp, horizon=200) # Plans should be shorter than 200 timesteps, or something is likely wrong
         successor_state, is_done = env.execute_plan(dummy_state, joint_action_plan)
         assert not is_done
@@ -734,7 +745,28 @@ class MediumLevelActionManager(object):
             pickle.dump(self, output, pickle.HIGHEST_PROTOCOL)
 
     def joint_ml_actions(self, state):
-        """Determine all possible joint medium level actions for a certain state"""
+        """Determine all possible joint medium level actions for a certain state
+
+        Planning agents query the same state repeatedly (both members of a planning
+        pair, repeated A* expansions of equivalent states), so results are memoized
+        per state. The cache lives on the manager instance, which is already scoped
+        to a single mdp/layout, and is accessed with getattr so that managers
+        unpickled from older files work too.
+        """
+        cache = getattr(self, "_joint_ml_actions_cache", None)
+        if cache is None:
+            cache = self._joint_ml_actions_cache = {}
+        if state in cache:
+            return cache[state]
+        valid_joint_ml_actions = self._compute_joint_ml_actions(state)
+        if len(cache) >= MAX_CACHE_SIZE:
+            # FIFO eviction, relying on dicts preserving insertion order
+            del cache[next(iter(cache))]
+        # Keying on a copy makes the cache immune to later in-place mutation of the state
+        cache[state.deepcopy()] = valid_joint_ml_actions
+        return valid_joint_ml_actions
+
+    def _compute_joint_ml_actions(self, state):
         agent1_actions, agent2_actions = tuple(self.get_medium_level_actions(state, player) for player in state.players)
         joint_ml_actions = list(itertools.product(agent1_actions, agent2_actions))
         
@@ -938,13 +970,24 @@ class MediumLevelPlanner(object):
     def get_low_level_action_plan(self, start_state, h_fn, delivery_horizon=4, debug=False, goal_info=False):
         """
         Get a plan of joint-actions executable in the environment that will lead to a goal number of deliveries
-        
+
         Args:
             state (OvercookedState): starting state
 
         Returns:
             full_joint_action_plan (list): joint actions to reach goal
+
+        Plans are memoized on (state, delivery_horizon, heuristic name), so
+        two coupled planning agents sharing one planner resolve the joint
+        plan once per timestep instead of re-running the search each.
         """
+        plan_cache = getattr(self, "_plan_cache", None)
+        if plan_cache is None:
+            plan_cache = self._plan_cache = {}
+        cache_key = (start_state.deepcopy(), delivery_horizon, getattr(h_fn, "__name__", repr(h_fn)))
+        if cache_key in plan_cache:
+            return plan_cache[cache_key]
+
         start_state = start_state.deepcopy()
         ml_plan, cost = self.get_ml_plan(start_state, h_fn, delivery_horizon=delivery_horizon, debug=debug)
 
@@ -956,6 +999,10 @@ class MediumLevelPlanner(object):
         )
         assert cost == len(full_joint_action_plan), "A* cost {} but full joint action plan cost {}".format(cost, len(full_joint_action_plan))
         if debug: print("Found plan with cost {}".format(cost))
+        if len(plan_cache) >= MAX_CACHE_SIZE:
+            # FIFO eviction, relying on dicts preserving insertion order
+            del plan_cache[next(iter(plan_cache))]
+        plan_cache[cache_key] = full_joint_action_plan
         return full_joint_action_plan
 
     def get_low_level_plan_from_ml_plan(self, start_state, ml_plan, heuristic_fn, debug=False, goal_info=False):
@@ -46,7 +46,9 @@ def fix_filetype(path, filetype):
 # MDP
 
 def cumulative_rewards_from_rew_list(rews):
-    return [sum(rews[:t]) for t in range(len(rews))]
+    """Cumulative reward obtained *before* each timestep, as a numpy array"""
+    rews = np.asarray(rews)
+    return np.cumsum(rews) - rews
 
 # Gridworld
 